@@ -24,6 +24,18 @@ header = f'// this file is automatically generated by running `python {script_na
 def bool_to_int(b):
     return "1" if b else "0"
 
+def write_if_changed(filepath, content):
+    # leave identical files untouched so their mtime does not trigger a rebuild
+    if os.path.exists(filepath):
+        with open(filepath) as f:
+            if f.read() == content:
+                return
+    # open() honours the umask, unlike tempfile.mkstemp which creates 0600 files
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
+
 # Function parameter list
 param_list = (
     "  int8_t* Q, int8_t* K, half* V, {dtype_out}* O,\n"
@@ -37,19 +49,15 @@ param_list = (
     "  float sm_scale\n"
 )
 
-# Generate combinations
+# Generate combinations, grouped into one translation unit per
+# (head_dim, dtype_out) so the kernel header is parsed once per group
+# instead of once per instantiation
+groups = {}
 for hd, qkg, pv_mode, dtype_out, causal, ret_pv_count in product(
         head_dims, qk_quant_grans, pv_threshold_modes, dtypes_out, is_causals, return_pv_counts):
     if ret_pv_count and pv_mode == 0:
         continue
     WARP_Q = 32 if hd == 64 else 16
-    filename = (
-        f"inst_sm80_ctaq{CTA_Q}_ctak{CTA_K}_warpq{WARP_Q}_warpk{WARP_K}"
-        f"_hd{hd}_qkg{qkg}_pvacc{DTypePVAccum}_ibuf{bool_to_int(use_inst_buffer)}"
-        f"_pvth{pv_mode}_o{dtype_out}_causal{bool_to_int(causal)}_retpvth{bool_to_int(ret_pv_count)}.cu"
-    )
-    filepath = os.path.join(output_dir, filename)
-
     instantiation = (
         f"template void SpargeAttentionSM80Dispatched<"
         f"{CTA_Q}, {CTA_K}, {WARP_Q}, {WARP_K}, {hd}, {qkg}, {DTypePVAccum}, "
@@ -58,8 +66,18 @@ for hd, qkg, pv_mode, dtype_out, causal, ret_pv_count in product(
         f">(\n{param_list.format(dtype_out=dtype_out)});"
     )
 
-    with open(filepath, "w") as f:
-        f.write(header)
-        f.write(instantiation + "\n")
+    groups.setdefault((hd, dtype_out), []).append(instantiation)
+
+filenames = set()
+for (hd, dtype_out), instantiations in groups.items():
+    filename = f"inst_sm80_hd{hd}_o{dtype_out}.cu"
+    filenames.add(filename)
+    content = header + "".join("\n" + instantiation + "\n" for instantiation in instantiations)
+    write_if_changed(os.path.join(output_dir, filename), content)
+
+# Remove translation units left over from a previous layout
+for filename in os.listdir(output_dir):
+    if filename.endswith(".cu") and filename not in filenames:
+        os.remove(os.path.join(output_dir, filename))
 
-print(f"Generated {len(os.listdir(output_dir))} instantiations in '{output_dir}'")
+print(f"Generated {sum(len(v) for v in groups.values())} instantiations in {len(filenames)} files in '{output_dir}'")
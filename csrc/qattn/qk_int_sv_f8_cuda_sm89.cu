@@ -99,8 +99,8 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale(torch::Tens
 
     CHECK_SHAPE(key, batch_size, kv_len, num_kv_heads, head_dim);
     CHECK_SHAPE(output, batch_size, qo_len, num_qo_heads, head_dim);
-    assert(value.size(1) == head_dim);
-    assert(value.size(2) == num_kv_heads);
+    TORCH_CHECK(value.size(1) == head_dim);
+    TORCH_CHECK(value.size(2) == num_kv_heads);
   }
   else
   {
@@ -120,8 +120,8 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale(torch::Tens
 
     CHECK_SHAPE(key, batch_size, num_kv_heads, kv_len, head_dim);
     CHECK_SHAPE(output, batch_size, num_qo_heads, qo_len, head_dim);
-    assert(value.size(2) == head_dim);
-    assert(value.size(1) == num_kv_heads);
+    TORCH_CHECK(value.size(2) == head_dim);
+    TORCH_CHECK(value.size(1) == num_kv_heads);
   }
 
   if (num_qo_heads % num_kv_heads != 0) {
@@ -142,8 +142,8 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale(torch::Tens
           constexpr int WARP_Q = 32;
           constexpr int WARP_K = 64;
 
-          assert(value.size(0) == batch_size);
-          assert(value.size(3) >= div_ceil(kv_len, CTA_K) * CTA_K);
+          TORCH_CHECK(value.size(0) == batch_size);
+          TORCH_CHECK(value.size(3) >= div_ceil(kv_len, CTA_K) * CTA_K);
 
           if constexpr (QK_QUANT_GRAN == 1)
           {
@@ -282,8 +282,8 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
 
     CHECK_SHAPE(key, batch_size, kv_len, num_kv_heads, head_dim);
     CHECK_SHAPE(output, batch_size, qo_len, num_qo_heads, head_dim);
-    assert(value.size(1) == head_dim);
-    assert(value.size(2) == num_kv_heads);
+    TORCH_CHECK(value.size(1) == head_dim);
+    TORCH_CHECK(value.size(2) == num_kv_heads);
   }
   else
   {
@@ -303,8 +303,8 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
 
     CHECK_SHAPE(key, batch_size, num_kv_heads, kv_len, head_dim);
     CHECK_SHAPE(output, batch_size, num_qo_heads, qo_len, head_dim);
-    assert(value.size(2) == head_dim);
-    assert(value.size(1) == num_kv_heads);
+    TORCH_CHECK(value.size(2) == head_dim);
+    TORCH_CHECK(value.size(1) == num_kv_heads);
   }
 
   if (num_qo_heads % num_kv_heads != 0) {
@@ -333,8 +333,8 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
               pv_count = torch::empty({batch_size, num_qo_heads, div_ceil(qo_len, CTA_Q) * (CTA_Q / WARP_Q)}, query.options().dtype(at::ScalarType::Int));
             }
 
-            assert(value.size(0) == batch_size);
-            assert(value.size(3) >= div_ceil(kv_len, CTA_K) * CTA_K);
+            TORCH_CHECK(value.size(0) == batch_size);
+            TORCH_CHECK(value.size(3) >= div_ceil(kv_len, CTA_K) * CTA_K);
 
             if constexpr (QK_QUANT_GRAN == 1)
             {
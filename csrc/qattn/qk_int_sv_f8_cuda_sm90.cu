@@ -83,7 +83,7 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_sm90(
   int padded_kv_len = value.size(3);
   int stride_seq_q, stride_h_q, stride_seq_k, stride_h_k, stride_h_v, stride_d_v, stride_seq_o, stride_h_o;
 
-  assert(value.size(0) == batch_size);
+  TORCH_CHECK(value.size(0) == batch_size);
 
   if (tensor_layout == 0)
   {
@@ -103,8 +103,8 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_sm90(
 
     CHECK_SHAPE(key, batch_size, kv_len, num_kv_heads, head_dim);
     CHECK_SHAPE(output, batch_size, qo_len, num_qo_heads, head_dim);
-    assert(value.size(1) == head_dim);
-    assert(value.size(2) == num_kv_heads);
+    TORCH_CHECK(value.size(1) == head_dim);
+    TORCH_CHECK(value.size(2) == num_kv_heads);
   }
   else
   {
@@ -124,8 +124,8 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_sm90(
 
     CHECK_SHAPE(key, batch_size, num_kv_heads, kv_len, head_dim);
     CHECK_SHAPE(output, batch_size, num_qo_heads, qo_len, head_dim);
-    assert(value.size(2) == head_dim);
-    assert(value.size(1) == num_kv_heads);
+    TORCH_CHECK(value.size(2) == head_dim);
+    TORCH_CHECK(value.size(1) == num_kv_heads);
   }
 
   if (num_qo_heads % num_kv_heads != 0) {
@@ -144,7 +144,7 @@ void qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_sm90(
           constexpr int CTA_K = 128;
           constexpr int NUM_THREADS = 128;
 
-          assert(padded_kv_len >= div_ceil(kv_len, CTA_K) * CTA_K);
+          TORCH_CHECK(padded_kv_len >= div_ceil(kv_len, CTA_K) * CTA_K);
 
           if constexpr (QK_QUANT_GRAN == 1)
           {
@@ -264,7 +264,7 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
   int padded_kv_len = value.size(3);
   int stride_seq_q, stride_h_q, stride_seq_k, stride_h_k, stride_h_v, stride_d_v, stride_seq_o, stride_h_o;
 
-  assert(value.size(0) == batch_size);
+  TORCH_CHECK(value.size(0) == batch_size);
 
   if (tensor_layout == 0)
   {
@@ -284,8 +284,8 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
 
     CHECK_SHAPE(key, batch_size, kv_len, num_kv_heads, head_dim);
     CHECK_SHAPE(output, batch_size, qo_len, num_qo_heads, head_dim);
-    assert(value.size(1) == head_dim);
-    assert(value.size(2) == num_kv_heads);
+    TORCH_CHECK(value.size(1) == head_dim);
+    TORCH_CHECK(value.size(2) == num_kv_heads);
   }
   else
   {
@@ -305,8 +305,8 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
 
     CHECK_SHAPE(key, batch_size, num_kv_heads, kv_len, head_dim);
     CHECK_SHAPE(output, batch_size, num_qo_heads, qo_len, head_dim);
-    assert(value.size(2) == head_dim);
-    assert(value.size(1) == num_kv_heads);
+    TORCH_CHECK(value.size(2) == head_dim);
+    TORCH_CHECK(value.size(1) == num_kv_heads);
   }
 
   if (num_qo_heads % num_kv_heads != 0) {
@@ -333,7 +333,7 @@ torch::Tensor qk_int8_sv_f8_accum_f32_block_sparse_attn_inst_buf_fuse_v_scale_wi
               pv_count = torch::empty({batch_size, num_qo_heads, div_ceil(qo_len, CTA_Q) * (CTA_Q / 16)}, query.options().dtype(at::ScalarType::Int));
             }
 
-            assert(padded_kv_len >= div_ceil(kv_len, CTA_K) * CTA_K);
+            TORCH_CHECK(padded_kv_len >= div_ceil(kv_len, CTA_K) * CTA_K);
 
             if constexpr (QK_QUANT_GRAN == 1)
             {
@@ -19,6 +19,8 @@
 #include <cuda_bf16.h>
 #include <cuda_fp8.h>
 #include <cassert>
+#include <cstdio>
+#include <cstdlib>
 
 #include "../wgmma.cuh"
 #include "../math.cuh"
@@ -55,7 +57,12 @@ CUtensorMap create_tensor_map_4D(T* gmem_ptr, int d1, int d2, int d3, int d4, in
     (swizzle == false) ? CU_TENSOR_MAP_SWIZZLE_NONE : (smem_stride == 128) ? CU_TENSOR_MAP_SWIZZLE_128B : (smem_stride == 64) ? CU_TENSOR_MAP_SWIZZLE_64B : CU_TENSOR_MAP_SWIZZLE_32B, 
     promotion_mode, CU_TENSOR_MAP_FLOAT_OOB_FILL_NONE);
 
-  assert(result == CUDA_SUCCESS);
+  // checked explicitly so the failure is still reported in NDEBUG builds
+  if (result != CUDA_SUCCESS)
+  {
+    fprintf(stderr, "cuTensorMapEncodeTiled failed with error %d\n", (int)result);
+    abort();
+  }
 
   return tma_map;
 }
@@ -14,7 +14,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import functools
+import hashlib
+import json
 import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import subprocess
 from packaging.version import parse, Version
@@ -25,44 +31,112 @@ from setuptools import setup, find_packages
 import torch
 from torch.utils.cpp_extension import BuildExtension, CUDAExtension, CUDA_HOME
 
+HAS_SM80 = False
+HAS_SM89 = False
 HAS_SM90 = False
 
-def run_instantiations(src_dir: str):
-    base_path = Path(src_dir)
-    py_files = [
-        path for path in base_path.rglob('*.py')
-        if path.is_file()
-    ]
+def _run_generator(py_file: Path):
+    print(f"Running: {py_file}")
+    try:
+        subprocess.run(
+            [sys.executable, py_file.name],
+            check=True,
+            cwd=py_file.parent,
+            # keep __pycache__ out of the source tree
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(
+            f"Kernel instantiation generator {py_file} failed with exit code "
+            f"{e.returncode}. Refusing to build with stale instantiations.") from e
+
+# records the hash of every generator script and the files it produced
+GENERATOR_CACHE_FILE = ".spargeattn_gen_cache.json"
+
+def run_instantiations(*src_dirs: str):
+    # run the generator scripts under src_dirs whose source changed (or whose
+    # outputs are missing) concurrently; each one is an independent
+    # interpreter, so threads are enough to fan out the processes
+    py_files = [path for src_dir in src_dirs for path in Path(src_dir).rglob('*.py')]
+
+    try:
+        with open(GENERATOR_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
 
+    digests = {py_file: hashlib.sha256(py_file.read_bytes()).hexdigest() for py_file in py_files}
+    stale_files = []
     for py_file in py_files:
-        print(f"Running: {py_file}")
-        os.system(f"python {py_file}")
+        entry = cache.get(str(py_file))
+        if (entry is not None and entry["hash"] == digests[py_file]
+                and entry["outputs"] and all(os.path.exists(output) for output in entry["outputs"])):
+            print(f"Up to date: {py_file}")
+        else:
+            stale_files.append(py_file)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(_run_generator, stale_files))
+
+    for py_file in stale_files:
+        cache[str(py_file)] = {
+            "hash": digests[py_file],
+            "outputs": sorted(str(path) for path in py_file.parent.rglob('*.cu')),
+        }
+    with open(GENERATOR_CACHE_FILE, "w") as f:
+        json.dump(cache, f, indent=2)
+
+@functools.lru_cache(maxsize=None)
+def _glob_instantiations(src_dir: str):
+    return tuple(str(path) for path in Path(src_dir).rglob('*.cu'))
 
 def get_instantiations(src_dir: str):
-    # get all .cu files under src_dir
-    base_path = Path(src_dir)
-    return [
-        os.path.join(src_dir, str(path.relative_to(base_path)))
-        for path in base_path.rglob('*')
-        if path.is_file() and path.suffix == ".cu"
-    ]
+    # get all .cu files under src_dir, walking each tree only once
+    return list(_glob_instantiations(os.path.normpath(src_dir)))
 
 # Supported NVIDIA GPU architectures.
 SUPPORTED_ARCHS = {"8.0", "8.6", "8.7", "8.9", "9.0"}
 
+# Parallel compile jobs (read by torch's BuildExtension) default to half the
+# cores. Set MAX_JOBS to override. The nvcc thread flags are sized per
+# extension in get_nvcc_thread_flags.
+os.environ.setdefault("MAX_JOBS", str(max(1, (os.cpu_count() or 2) // 2)))
+
 # Compiler flags.
-CXX_FLAGS = ["-g", "-O3", "-fopenmp", "-lgomp", "-std=c++17", "-DENABLE_BF16"]
+CXX_FLAGS = ["-O3", "-fopenmp", "-std=c++17", "-DENABLE_BF16"]
 NVCC_FLAGS = [
     "-O3",
     "-std=c++17",
     "-U__CUDA_NO_HALF_OPERATORS__",
     "-U__CUDA_NO_HALF_CONVERSIONS__",
-    "--use_fast_math",
-    "--threads=8",
-    "-Xptxas=-v",
+    "-Xptxas=-warn-spills,-warn-lmem-usage", # flag register spills and local memory use in the MMA kernels
     "-diag-suppress=174", # suppress the specific warning
-    "-Xcompiler", "-include,cassert", # fix error occurs when compiling for SM90+ with newer CUDA toolkits
+    "-Wno-deprecated-gpu-targets",
 ]
+# fix error occurs when compiling for SM90+ with newer CUDA toolkits; only
+# passed to extensions that target sm_90a
+NVCC_FLAGS_SM90 = ["-Xcompiler", "-include,cassert"]
+
+# --use_fast_math implies -ftz=true -prec-div=false -prec-sqrt=false -fmad=true
+# and maps math functions to approximate intrinsics. SPARGE_FAST_MATH=0 keeps
+# only denormal flushing and FMA contraction, leaving division and sqrt IEEE
+# compliant.
+if os.environ.get("SPARGE_FAST_MATH", "1") == "1":
+    NVCC_FLAGS += ["--use_fast_math"]
+    print("Building with --use_fast_math")
+else:
+    NVCC_FLAGS += ["-ftz=true", "-fmad=true"]
+    print("Building without --use_fast_math (-ftz=true -fmad=true)")
+
+# print per-kernel register/smem usage
+if os.environ.get("SPARGE_VERBOSE", "0") == "1":
+    NVCC_FLAGS += ["-Xptxas=-v"]
+
+if os.environ.get("SPARGE_DEBUG", "0") == "1":
+    CXX_FLAGS += ["-g"]
+else:
+    CXX_FLAGS += ["-DNDEBUG"]
+    NVCC_FLAGS += ["-DNDEBUG"]
 
 ABI = 1 if torch._C._GLIBCXX_USE_CXX11_ABI else 0
 CXX_FLAGS += [f"-D_GLIBCXX_USE_CXX11_ABI={ABI}"]
@@ -75,13 +149,47 @@ if CUDA_HOME is None:
 def get_nvcc_cuda_version(cuda_dir: str) -> Version:
     """Get the CUDA version from nvcc.
 
+    The parsed version is cached in $XDG_CACHE_HOME (default ~/.cache)
+    under spargeattn/nvcc_version.json,
+    keyed by the nvcc path and its mtime, so repeated setup.py invocations
+    skip running nvcc.
+
     Adapted from https://github.com/NVIDIA/apex/blob/8b7a1ff183741dd8f9b87e7bafd04cfde99cea28/setup.py
     """
-    nvcc_output = subprocess.check_output([cuda_dir + "/bin/nvcc", "-V"],
+    nvcc_path = cuda_dir + "/bin/nvcc"
+    cache_key = hashlib.sha256(
+        f"{os.path.realpath(nvcc_path)}:{os.stat(nvcc_path).st_mtime}".encode()).hexdigest()
+    cache_file = None
+    cache = {}
+    try:
+        # an empty XDG_CACHE_HOME counts as unset; expanduser leaves "~" as is
+        # when there is no home directory, so relative paths disable the cache
+        cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        if not os.path.isabs(cache_dir):
+            raise OSError(f"no usable cache directory: {cache_dir!r}")
+        cache_file = Path(cache_dir) / "spargeattn" / "nvcc_version.json"
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if cache_key in cache:
+        return parse(cache[cache_key])
+
+    nvcc_output = subprocess.check_output([nvcc_path, "-V"],
                                           universal_newlines=True)
     output = nvcc_output.split()
     release_idx = output.index("release") + 1
     nvcc_cuda_version = parse(output[release_idx].split(",")[0])
+
+    if cache_file is not None:
+        cache[cache_key] = str(nvcc_cuda_version)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, "w") as f:
+                json.dump(cache, f, indent=2)
+        except OSError:
+            # the cache is only an optimization, e.g. the home directory may be read-only
+            pass
     return nvcc_cuda_version
 
 def get_torch_arch_list() -> Set[str]:
@@ -135,6 +243,31 @@ nvcc_cuda_version = get_nvcc_cuda_version(CUDA_HOME)
 if not compute_capabilities:
     raise RuntimeError("No GPUs found. Please specify the target GPU architectures or build on a machine with GPUs.")
 
+# SPARGE_SINGLE_ARCH=1 builds for exactly one architecture: the only
+# requested one, or the current GPU if it is among several requested ones.
+# PTX is only embedded if it was requested for that architecture with +PTX.
+if os.environ.get("SPARGE_SINGLE_ARCH", "0") == "1":
+    requested = {cc.replace("+PTX", "") for cc in compute_capabilities}
+    if len(requested) > 1:
+        local_capability = None
+        if torch.cuda.device_count() > 0:
+            major, minor = torch.cuda.get_device_capability()
+            local_capability = f"{major}.{minor}"
+        if local_capability not in requested:
+            raise RuntimeError(
+                "SPARGE_SINGLE_ARCH=1 requires a single target architecture, but "
+                f"{sorted(requested)} were requested and the current GPU "
+                f"({local_capability or 'none'}) is not one of them. Set "
+                "TORCH_CUDA_ARCH_LIST to a single architecture.")
+        requested = {local_capability}
+    single_arch = next(iter(requested))
+    with_ptx = f"{single_arch}+PTX" in compute_capabilities
+    compute_capabilities = {single_arch + ("+PTX" if with_ptx else "")}
+    warnings.warn(
+        "SPARGE_SINGLE_ARCH=1: building only for compute capability "
+        f"{single_arch} ({'SASS and PTX' if with_ptx else 'SASS only, no PTX'}). "
+        "The resulting package is not portable to other GPU architectures.")
+
 # Validate the NVCC CUDA version.
 if nvcc_cuda_version < Version("12.0"):
     raise RuntimeError("CUDA 12.0 or higher is required to build the package.")
@@ -146,51 +279,122 @@ if nvcc_cuda_version < Version("12.4"):
         raise RuntimeError(
             "CUDA 12.4 or higher is required for compute capability 9.0.")
 
-# Add target compute capabilities to NVCC flags.
+# Collect the gencode flags of every target compute capability.
+GENCODE_FLAGS = {}
 for capability in compute_capabilities:
     num = capability[0] + capability[2]
+    HAS_SM80 = True
+    # the fp8 kernels of the SM89 family also run on Hopper
+    if num in ('89', '90'):
+        HAS_SM89 = True
     if num == '90':
         num = '90a'
         HAS_SM90 = True
-        CXX_FLAGS += ["-DHAS_SM90"]
-    NVCC_FLAGS += ["-gencode", f"arch=compute_{num},code=sm_{num}"]
+    gencode_flags = GENCODE_FLAGS.setdefault(num, [])
+    gencode_flags += ["-gencode", f"arch=compute_{num},code=sm_{num}"]
     if capability.endswith("+PTX"):
-        NVCC_FLAGS += ["-gencode", f"arch=compute_{num},code=compute_{num}"]
+        gencode_flags += ["-gencode", f"arch=compute_{num},code=compute_{num}"]
+
+def get_gencode_flags(nums) -> List[str]:
+    return [flag for num in sorted(nums) for flag in GENCODE_FLAGS[num]]
+
+def get_nvcc_thread_flags(num_gencodes: int, num_cuda_sources: int) -> List[str]:
+    # setuptools builds extensions one after another, so at most
+    # min(MAX_JOBS, TUs of this extension) nvcc jobs run at once. Each job's
+    # share of the cores is split between --threads (parallel gencode passes)
+    # and --split-compile (parallel optimization within a pass), which stack.
+    concurrent_jobs = max(1, min(int(os.environ["MAX_JOBS"]), num_cuda_sources))
+    budget = max(1, (os.cpu_count() or 8) // concurrent_jobs)
+    threads = max(1, min(num_gencodes, budget))
+    return [f"--threads={threads}", f"--split-compile={max(1, budget // threads)}"]
+
+def get_nvcc_flags(nums, sources: List[str]) -> List[str]:
+    gencode_flags = get_gencode_flags(nums)
+    num_cuda_sources = sum(source.endswith(".cu") for source in sources)
+    flags = NVCC_FLAGS + gencode_flags + get_nvcc_thread_flags(gencode_flags.count("-gencode"), num_cuda_sources)
+    if "90a" in nums:
+        flags += NVCC_FLAGS_SM90
+    return flags
+
+class SpargeBuildExtension(BuildExtension):
+    """BuildExtension that routes compiler calls through sccache when it is available."""
+
+    def build_extensions(self):
+        launcher = None
+        if os.environ.get("SPARGE_SCCACHE", "1") == "1":
+            launcher = shutil.which("sccache")
+
+        if launcher is not None:
+            print(f"Using compiler launcher: {launcher}")
+            # ninja builds read the nvcc command from PYTORCH_NVCC
+            os.environ.setdefault("PYTORCH_NVCC", f"{launcher} {os.path.join(CUDA_HOME, 'bin', 'nvcc')}")
+            compiler_so = list(self.compiler.compiler_so)
+            if os.path.basename(compiler_so[0]) != "sccache":
+                self.compiler.set_executable("compiler_so", [launcher] + compiler_so)
+            # keep colored diagnostics, which are lost once output goes through the wrapper
+            for ext in self.extensions:
+                ext.extra_compile_args["nvcc"] = ext.extra_compile_args["nvcc"] + ["-Xcompiler", "-fdiagnostics-color=always"]
+
+        super().build_extensions()
 
 ext_modules = []
 
-run_instantiations("csrc/qattn/instantiations_sm80")
-run_instantiations("csrc/qattn/instantiations_sm89")
-run_instantiations("csrc/qattn/instantiations_sm90")
+run_instantiations(*[
+    f"csrc/qattn/instantiations_{arch}"
+    for arch, enabled in (("sm80", HAS_SM80), ("sm89", HAS_SM89), ("sm90", HAS_SM90))
+    if enabled
+])
+
+# Each kernel family is built as its own extension so that its TUs only go
+# through the gencode passes of the architectures it can run on.
+# spas_sage_attn/_qattn_ops.py merges them back into a single module.
+qattn_sources = {}
+qattn_archs = {}
 
-sources = [
-    "csrc/qattn/pybind.cpp",
-    "csrc/qattn/qk_int_sv_f16_cuda_sm80.cu",
-    "csrc/qattn/qk_int_sv_f8_cuda_sm89.cu",
-] + get_instantiations("csrc/qattn/instantiations_sm80") + get_instantiations("csrc/qattn/instantiations_sm89")
+if HAS_SM80:
+    qattn_sources["sm80"] = [
+        "csrc/qattn/pybind_sm80.cpp",
+        "csrc/qattn/qk_int_sv_f16_cuda_sm80.cu",
+    ] + get_instantiations("csrc/qattn/instantiations_sm80")
+    qattn_archs["sm80"] = GENCODE_FLAGS.keys()
+
+if HAS_SM89:
+    qattn_sources["sm89"] = [
+        "csrc/qattn/pybind_sm89.cpp",
+        "csrc/qattn/qk_int_sv_f8_cuda_sm89.cu",
+    ] + get_instantiations("csrc/qattn/instantiations_sm89")
+    qattn_archs["sm89"] = [num for num in GENCODE_FLAGS if num in ("89", "90a")]
 
 if HAS_SM90:
-    sources += ["csrc/qattn/qk_int_sv_f8_cuda_sm90.cu", ]
-    sources += get_instantiations("csrc/qattn/instantiations_sm90")
+    qattn_sources["sm90"] = [
+        "csrc/qattn/pybind_sm90.cpp",
+        "csrc/qattn/qk_int_sv_f8_cuda_sm90.cu",
+    ] + get_instantiations("csrc/qattn/instantiations_sm90")
+    # the hand-written wgmma/TMA code in csrc/wgmma.cuh needs the
+    # arch-specific sm_90a target; no CUTLASS macros are involved
+    qattn_archs["sm90"] = ["90a"]
 
-qattn_extension = CUDAExtension(
-    name="spas_sage_attn._qattn",
-    sources=sources,
-    extra_compile_args={
-        "cxx": CXX_FLAGS,
-        "nvcc": NVCC_FLAGS,
-    },
-    extra_link_args=['-lcuda'],
-)
-ext_modules.append(qattn_extension)
+for arch, arch_sources in qattn_sources.items():
+    qattn_extension = CUDAExtension(
+        name=f"spas_sage_attn._qattn_{arch}",
+        sources=arch_sources,
+        extra_compile_args={
+            "cxx": CXX_FLAGS,
+            "nvcc": get_nvcc_flags(qattn_archs[arch], arch_sources),
+        },
+        extra_link_args=['-lcuda', '-lgomp'],
+    )
+    ext_modules.append(qattn_extension)
 
+fused_sources = ["csrc/fused/pybind.cpp", "csrc/fused/fused.cu"]
 fused_extension = CUDAExtension(
     name="spas_sage_attn._fused",
-    sources=["csrc/fused/pybind.cpp", "csrc/fused/fused.cu"],
+    sources=fused_sources,
     extra_compile_args={
         "cxx": CXX_FLAGS,
-        "nvcc": NVCC_FLAGS,
+        "nvcc": get_nvcc_flags(GENCODE_FLAGS.keys(), fused_sources),
     },
+    extra_link_args=['-lgomp'],
 )
 ext_modules.append(fused_extension)
 
@@ -199,7 +403,12 @@ setup(
     version='0.1.0',  
     author='Jintao Zhang, Chendong Xiang, Haofeng Huang',  
     author_email='jt-zhang6@gmail.com', 
-    packages=find_packages(),  
+    # tools is imported by spas_sage_attn.autotune at runtime
+    packages=find_packages(
+        include=["spas_sage_attn", "spas_sage_attn.*", "tools", "tools.*"],
+        exclude=["tests*", "csrc*", "benchmarks*", "evaluate*"],
+    ),
+    zip_safe=False,
     description='Accurate and efficient Sparse SageAttention.',  
     long_description=open('README.md', encoding='utf-8').read(),  
     long_description_content_type='text/markdown', 
@@ -218,5 +427,5 @@ setup(
         'Operating System :: OS Independent',
     ],
     ext_modules=ext_modules,
-    cmdclass={"build_ext": BuildExtension},
+    cmdclass={"build_ext": SpargeBuildExtension},
 )
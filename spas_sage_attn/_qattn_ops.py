@@ -0,0 +1,37 @@
+"""
+Copyright (c) 2025 by SpargeAttn team.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# The attention kernels are built as one extension per kernel family
+# (see setup.py). Re-export all of them under a single module. This module is
+# deliberately not named `_qattn`: a `_qattn.*.so` left over from an older
+# in-place build would take precedence over a `_qattn.py` on import.
+
+import importlib
+
+_loaded = []
+for _arch in ("sm80", "sm89", "sm90"):
+    try:
+        _module = importlib.import_module(f"spas_sage_attn._qattn_{_arch}")
+    except ModuleNotFoundError:
+        continue
+    _loaded.append(_arch)
+    globals().update({name: value for name, value in vars(_module).items() if not name.startswith("_")})
+
+if not _loaded:
+    raise ImportError(
+        "None of the spas_sage_attn._qattn_sm80/_sm89/_sm90 extensions could be "
+        "imported. Please rebuild the package with `pip install -e .` or "
+        "`python setup.py install`.")
@@ -19,7 +19,7 @@ from .utils import hyperparameter_check, get_block_map_meansim, get_block_map_me
 from .quant_per_block import per_block_int8, per_warp_int8
 from einops import rearrange
 
-import spas_sage_attn._qattn as qattn
+import spas_sage_attn._qattn_ops as qattn
 import spas_sage_attn._fused as fused
 
 